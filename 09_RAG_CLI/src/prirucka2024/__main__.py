@@ -3,6 +3,9 @@ import click
 from prirucka2024.download_url import download_url as download_url_func
 from prirucka2024.rag import prompt, retrieve
 from prirucka2024.split_html_on_headers import split_html as split_html_func
+from prirucka2024.split_html_on_headers import (
+    split_html_batch as split_html_batch_func,
+)
 from prirucka2024.fill_vector_store import fill_vector_store as fill_vector_store_func
 from prirucka2024.pdf_parser_raw import parse_pdf_raw as parse_pdf_raw_func
 from prirucka2024.split_text_recursively import (
@@ -49,6 +52,32 @@ def split_html_on_headers(
     split_html_func(file_path, output_pkl, output_txt, interactive, drop_empty_metadata)
 
 
+@main.command()
+@click.argument("file_paths", nargs=-1, required=True)
+@click.option(
+    "--output-dir",
+    default=".",
+    help="Directory for the pickle and text output files.",
+)
+@click.option(
+    "--drop-empty-metadata", is_flag=True, help="Drop splits with empty metadata."
+)
+@click.option(
+    "--max-workers",
+    type=int,
+    default=None,
+    help="Number of worker processes (default: number of CPUs).",
+)
+def split_html_batch(file_paths, output_dir, drop_empty_metadata, max_workers):
+    """Split several HTML files on headers in parallel and save results."""
+    split_html_batch_func(
+        file_paths,
+        output_dir,
+        drop_empty_metadata=drop_empty_metadata,
+        max_workers=max_workers,
+    )
+
+
 @main.command()
 @click.argument("pickle_file")
 @click.argument("chroma_db_dir")
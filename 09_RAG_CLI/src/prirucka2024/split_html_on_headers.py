@@ -1,8 +1,10 @@
+import io
 import os
+from concurrent.futures import ProcessPoolExecutor
 import pickle
 import logging
-from rich import print
-from langchain_text_splitters import HTMLHeaderTextSplitter
+from lxml import etree
+from langchain_core.documents import Document
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -14,10 +16,26 @@ HEADERS_TO_SPLIT_ON = [
     ("h2", "Header 2"),
     ("h3", "Header 3"),
 ]
+HEADER_MAPPING = dict(HEADERS_TO_SPLIT_ON)
 
-html_splitter = HTMLHeaderTextSplitter(HEADERS_TO_SPLIT_ON)
+# Elements whose text never ends up in a split
+SKIPPED_TAGS = frozenset({"head", "noscript", "script", "style", "template"})
 
-from bs4 import BeautifulSoup
+# Elements that separate blocks of text; text inside other (inline) elements
+# such as <a>, <b> or <code> is joined with its surroundings as written
+BLOCK_TAGS = frozenset(
+    {"address", "article", "aside", "blockquote", "body", "br", "caption"}
+    | {"dd", "details", "div", "dl", "dt", "figcaption", "figure", "footer"}
+    | {"form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "html"}
+    | {"li", "main", "nav", "ol", "p", "pre", "section", "summary", "table"}
+    | {"tbody", "td", "tfoot", "th", "thead", "tr", "ul"}
+)
+
+# ANSI escape sequence moving the cursor home and clearing the screen
+CLEAR_SCREEN = "\033[H\033[J"
+
+# Elements named $tag that have a class attribute
+SECTION_XPATH = etree.XPath("//*[name() = $tag][@class]")
 
 
 def preprocess_html(html_string, target_tag=None, target_class=None):
@@ -25,30 +43,186 @@ def preprocess_html(html_string, target_tag=None, target_class=None):
     Preprocess HTML content by optionally focusing on a specific tag and class.
 
     Args:
-        html_string (str): The raw HTML content.
+        html_string (str or bytes): The raw HTML content, bytes are UTF-8.
         target_tag (str): The HTML tag to target (e.g., "div").
         target_class (str): The class of the target tag (e.g., "theme-doc-markdown markdown").
+            Several space-separated classes must all be present, in any order.
 
     Returns:
-        str: Processed HTML content within the specified tag and class.
+        str or bytes: Processed HTML content within the specified tag and class.
+    """
+    # Without a target the content is used as is, so skip parsing it
+    if not (target_tag and target_class):
+        logger.info("No specific target specified; processing full HTML content.")
+        return html_string
+
+    if isinstance(html_string, str):
+        # lxml rejects str input that carries an XML encoding declaration
+        html_string = html_string.encode("utf-8")
+    tree = etree.fromstring(
+        html_string, etree.HTMLParser(encoding="utf-8", huge_tree=True)
+    )
+
+    # Focus only on the section with target_tag and target_class
+    logger.info(f"Filtering content within <{target_tag} class='{target_class}'>")
+    target_classes = set(target_class.split())
+    section = None
+    if tree is not None:
+        section = next(
+            (
+                element
+                for element in SECTION_XPATH(tree, tag=target_tag.lower())
+                if target_classes <= set(element.get("class").split())
+            ),
+            None,
+        )
+    if section is not None:
+        return etree.tostring(
+            section, encoding="unicode", method="html", with_tail=False
+        )
+    else:
+        logger.warning(
+            f"No matching <{target_tag} class='{target_class}'> found in the HTML."
+        )
+        return ""  # Return an empty string if the tag is not found
+
+
+class HeaderSplitTarget:
+    """
+    lxml parser target that splits HTML on the headers in HEADERS_TO_SPLIT_ON.
+
+    The parser streams events into this target instead of building a tree,
+    so memory stays bounded by the section being collected.
     """
-    soup = BeautifulSoup(html_string, "html.parser")
-
-    # If target_tag and target_class are specified, focus only on that section
-    if target_tag and target_class:
-        logger.info(f"Filtering content within <{target_tag} class='{target_class}'>")
-        section = soup.find(target_tag, class_=target_class)
-        if section:
-            return str(section)
+
+    def __init__(self):
+        self.documents = []
+        self.current_metadata = {}
+        self.current_content = []
+        self.active_headers = {}
+        self.header_content = None
+        self.skip_depth = 0
+        self.pre_depth = 0
+        self.text = []
+
+    def _flush_text(self):
+        # Text of one block, possibly split over several inline elements
+        text = "".join(self.text)
+        self.text = []
+        # Code keeps its line structure, other text is collapsed to single spaces
+        text = text.strip() if self.pre_depth else " ".join(text.split())
+        if not text:
+            return
+        if self.header_content is not None:
+            self.header_content.append(text)
         else:
-            logger.warning(
-                f"No matching <{target_tag} class='{target_class}'> found in the HTML."
+            self.current_content.append(text)
+
+    def _flush_document(self):
+        # Headers without content of their own get no split, their text is
+        # already in the metadata of every split below them
+        if self.current_content:
+            self.documents.append(
+                Document(
+                    page_content=" ".join(self.current_content),
+                    metadata=self.current_metadata,
+                )
             )
-            return ""  # Return an empty string if the tag is not found
+        self.current_content = []
+
+    def start(self, tag, attrib):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+        elif self.skip_depth:
+            # Nothing inside skipped elements, headers included, starts a section
+            return
+        elif tag in HEADER_MAPPING:
+            self._flush_text()
+            self._flush_document()
+            self.header_content = []
+        elif self.pre_depth:
+            # Markup inside code blocks is inline, only line breaks matter
+            if tag == "br":
+                self.text.append("\n")
+        elif tag in BLOCK_TAGS:
+            self._flush_text()
+        if tag == "pre":
+            self.pre_depth += 1
+
+    def end(self, tag):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth -= 1
+        elif self.skip_depth:
+            return
+        elif tag in HEADER_MAPPING and self.header_content is not None:
+            self._flush_text()
+            # A header closes the open sections on its own and deeper levels
+            self.active_headers = {
+                header: text
+                for header, text in self.active_headers.items()
+                if header < tag
+            }
+            self.active_headers[tag] = " ".join(self.header_content)
+            self.current_metadata = {
+                HEADER_MAPPING[header]: text
+                for header, text in self.active_headers.items()
+            }
+            self.header_content = None
+        elif tag in BLOCK_TAGS and (not self.pre_depth or tag == "pre"):
+            self._flush_text()
+        if tag == "pre":
+            self.pre_depth -= 1
+
+    def data(self, data):
+        if not self.skip_depth:
+            self.text.append(data)
+
+    def close(self):
+        self._flush_text()
+        self._flush_document()
+        return self.documents
+
+
+def split_text(html):
+    """
+    Split an HTML string into documents on the headers in HEADERS_TO_SPLIT_ON.
+
+    Args:
+        html (str or bytes): The HTML content.
+
+    Returns:
+        list: Documents with the header texts stored in their metadata.
+    """
+    if isinstance(html, str):
+        # lxml rejects str input that carries an XML encoding declaration
+        html = html.encode("utf-8")
+
+    parser = etree.HTMLParser(
+        target=HeaderSplitTarget(), encoding="utf-8", huge_tree=True
+    )
+    return etree.fromstring(html, parser)
+
+
+def split_text_from_file(file):
+    """
+    Split an HTML file into documents on the headers in HEADERS_TO_SPLIT_ON.
+
+    Files are decoded as UTF-8 by lxml itself. Prefer binary-mode file
+    objects, text-mode ones have to be read and re-encoded first.
+
+    Args:
+        file (str or file-like): Path to the HTML file or an open file object.
+
+    Returns:
+        list: Documents with the header texts stored in their metadata.
+    """
+    if isinstance(file, io.TextIOBase):
+        return split_text(file.read())
 
-    # Default preprocessing if no target is specified
-    logger.info("No specific target specified; processing full HTML content.")
-    return html_string
+    parser = etree.HTMLParser(
+        target=HeaderSplitTarget(), encoding="utf-8", huge_tree=True
+    )
+    return etree.parse(file, parser)
 
 
 def split_html(
@@ -71,61 +245,161 @@ def split_html(
         target_tag (str): The HTML tag to target (e.g., "div").
         target_class (str): The class of the target tag (e.g., "theme-doc-markdown markdown").
         drop_empty_metadata (bool): Whether to drop splits with empty metadata.
+
+    Returns:
+        bool: True if the results were saved, False if an error was logged.
     """
     try:
-        # Read HTML file
-        with open(file_path, "r", encoding="utf-8") as f:
-            html_string = f.read()
-
-        # Preprocess HTML content
-        preprocessed_html = preprocess_html(html_string, target_tag, target_class)
-
-        if not preprocessed_html.strip():
-            logger.warning("Preprocessed HTML is empty. No splits generated.")
-            with open(output_pkl, "wb") as f:
-                pickle.dump([], f)
-            with open(output_txt, "w", encoding="utf-8") as f:
-                f.write("")
-            return
+        if target_tag and target_class:
+            # Read HTML file as bytes, lxml decodes it while parsing
+            with open(file_path, "rb") as f:
+                html_content = f.read()
 
-        # Use the preprocessed HTML for splitting
-        all_html_header_splits = []
-        html_header_splits = html_splitter.split_text(preprocessed_html)
+            # Preprocess HTML content
+            preprocessed_html = preprocess_html(html_content, target_tag, target_class)
 
-        for split in html_header_splits:
-            if drop_empty_metadata and not split.metadata:
-                logger.info(f"Dropping split with empty metadata: {split.page_content}")
-                continue
+            if not preprocessed_html.strip():
+                logger.warning("Preprocessed HTML is empty. No splits generated.")
+                with open(output_pkl, "wb") as f:
+                    pickle.dump([], f, protocol=pickle.HIGHEST_PROTOCOL)
+                with open(output_txt, "w", encoding="utf-8") as f:
+                    f.write("")
+                return True
+
+            # Use the preprocessed HTML for splitting
+            all_html_header_splits = split_text(preprocessed_html)
+        else:
+            # Nothing to preprocess, so let lxml pull the file in chunks
+            # instead of holding a full copy of it in memory
+            logger.info("No specific target specified; processing full HTML content.")
+            with open(file_path, "rb") as f:
+                all_html_header_splits = split_text_from_file(f)
+
+        if drop_empty_metadata:
+            splits_count = len(all_html_header_splits)
+            all_html_header_splits = [
+                split for split in all_html_header_splits if split.metadata
+            ]
+            logger.info(
+                "Dropped splits with empty metadata: "
+                f"{splits_count - len(all_html_header_splits)}"
+            )
 
-            if interactive:
-                os.system("cls" if os.name == "nt" else "clear")  # Clear the screen
+        if interactive:
+            if os.name == "nt":
+                os.system("")  # Enable ANSI escape sequences in the Windows console
+            kept_splits = []
+            for split in all_html_header_splits:
+                print(CLEAR_SCREEN, end="")
                 print("=====")
                 print(split.metadata)
                 print(split.page_content)
                 user_input = input(
                     "Press <Enter> to keep this split, <d> to disregard: "
                 )
-                if user_input.lower() == "d":
-                    continue
-
-            all_html_header_splits.append(split)
+                if user_input.lower() != "d":
+                    kept_splits.append(split)
+            all_html_header_splits = kept_splits
 
         # Save splits to pickle
         with open(output_pkl, "wb") as f:
-            pickle.dump(all_html_header_splits, f)
+            pickle.dump(all_html_header_splits, f, protocol=pickle.HIGHEST_PROTOCOL)
         logger.info(f"Serialized splits saved to {output_pkl}")
 
         # Save splits to text file
         with open(output_txt, "w", encoding="utf-8") as f:
-            for header_split in all_html_header_splits:
-                f.write("=====\n")
-                f.write(str(header_split.metadata) + "\n")
-                f.write(header_split.page_content + "\n")
+            f.write(
+                "".join(
+                    f"=====\n{header_split.metadata}\n{header_split.page_content}\n"
+                    for header_split in all_html_header_splits
+                )
+            )
         logger.info(f"Split contents saved to {output_txt}")
 
         logger.info(f"Number of header splits: {len(all_html_header_splits)}")
+        return True
 
     except FileNotFoundError:
         logger.error(f"File not found: {file_path}")
     except Exception as e:
         logger.error(f"An error occurred: {e}")
+    return False
+
+
+def split_html_batch(
+    file_paths,
+    output_dir,
+    target_tag=None,
+    target_class=None,
+    drop_empty_metadata=True,
+    max_workers=None,
+):
+    """
+    Split several HTML files on headers in parallel worker processes.
+
+    Each file is processed by split_html; its results are saved as
+    <name>.pkl and <name>.txt in output_dir, below the same subdirectories
+    the file has relative to the common directory of all file_paths.
+    Interactive mode is not available here because the workers cannot
+    prompt the user.
+
+    Args:
+        file_paths (list): Paths to the HTML files.
+        output_dir (str): Directory for the pickle and text files.
+        target_tag (str): The HTML tag to target (e.g., "div").
+        target_class (str): The class of the target tag (e.g., "theme-doc-markdown markdown").
+        drop_empty_metadata (bool): Whether to drop splits with empty metadata.
+        max_workers (int): Number of worker processes, defaults to the CPU count.
+
+    Returns:
+        list: (pickle file, text file) pairs of the files that were split
+            successfully, in the order of file_paths.
+
+    Raises:
+        ValueError: If two files would be saved under the same output name.
+    """
+    if not file_paths:
+        return []
+
+    # Mirror the input layout so that pages sharing a file name in different
+    # directories (e.g. a/index.html and b/index.html) do not overwrite
+    # each other's results
+    root = os.path.commonpath(
+        [os.path.dirname(os.path.abspath(file_path)) for file_path in file_paths]
+    )
+    outputs = []
+    for file_path in file_paths:
+        relative_path = os.path.relpath(os.path.abspath(file_path), root)
+        name = os.path.join(output_dir, os.path.splitext(relative_path)[0])
+        outputs.append((f"{name}.pkl", f"{name}.txt"))
+
+    if len(set(outputs)) != len(outputs):
+        duplicates = sorted({output for output in outputs if outputs.count(output) > 1})
+        raise ValueError(f"Several input files map to the same outputs: {duplicates}")
+
+    for output_pkl, _ in outputs:
+        os.makedirs(os.path.dirname(output_pkl), exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                split_html,
+                file_path,
+                output_pkl,
+                output_txt,
+                False,
+                target_tag,
+                target_class,
+                drop_empty_metadata,
+            )
+            for file_path, (output_pkl, output_txt) in zip(file_paths, outputs)
+        ]
+        succeeded = [future.result() for future in futures]
+
+    failed = [str(file_path) for file_path, ok in zip(file_paths, succeeded) if not ok]
+    if failed:
+        logger.warning(f"Failed to split {len(failed)} HTML files: {failed}")
+
+    outputs = [output for output, ok in zip(outputs, succeeded) if ok]
+    logger.info(f"Split {len(outputs)} HTML files into {output_dir}")
+    return outputs
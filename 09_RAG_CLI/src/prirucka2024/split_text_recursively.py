@@ -24,4 +24,4 @@ def split_text_recursively(infile, outfile, chunk_size=200, chunk_overlap=50):
     documents = text_splitter.create_documents([content])
 
     with open(outfile, "wb") as f:
-        pickle.dump(documents, f)
+        pickle.dump(documents, f, protocol=pickle.HIGHEST_PROTOCOL)
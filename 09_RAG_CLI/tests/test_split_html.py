@@ -1,6 +1,11 @@
 import pickle
 import pytest
-from prirucka2024.split_html_on_headers import split_html
+from prirucka2024.split_html_on_headers import (
+    split_html,
+    split_html_batch,
+    split_text,
+    split_text_from_file,
+)
 
 
 @pytest.fixture
@@ -117,3 +122,186 @@ def test_split_html_empty_filter(setup_test_data, tmp_path):
         splits = pickle.load(f)
 
     assert len(splits) == 0  # No splits should match
+
+
+def test_split_html_with_reordered_classes(tmp_path):
+    """Test that the target classes match in any order and with other classes."""
+    file_path = tmp_path / "docs.html"
+    file_path.write_text(
+        """
+        <html>
+          <body>
+            <div class="markdown">
+              <h1>Outside</h1>
+              <p>Only one of the target classes.</p>
+            </div>
+            <div class="theme-doc-markdown extra markdown">
+              <h1>Inside</h1>
+              <p>Both target classes, not adjacent.</p>
+            </div>
+          </body>
+        </html>
+        """
+    )
+    output_pkl = tmp_path / "output.pkl"
+    output_txt = tmp_path / "output.txt"
+
+    split_html(
+        file_path,
+        output_pkl,
+        output_txt,
+        interactive=False,
+        target_tag="div",
+        target_class="markdown theme-doc-markdown",
+    )
+
+    with open(output_pkl, "rb") as f:
+        splits = pickle.load(f)
+
+    assert len(splits) == 1
+    assert splits[0].metadata == {"Header 1": "Inside"}
+    assert splits[0].page_content == "Both target classes, not adjacent."
+
+
+def test_split_text_matches_split_text_from_file(setup_test_data):
+    """Test that splitting a string and splitting the file give the same result."""
+    file_path = setup_test_data / "sample1.html"
+
+    from_file = split_text_from_file(str(file_path))
+    from_string = split_text(file_path.read_text())
+
+    assert from_file == from_string
+    assert [split.metadata for split in from_file] == [
+        {"Header 1": "Header 1"},
+        {"Header 1": "Header 1", "Header 2": "Header 2"},
+        {"Header 1": "Header 1", "Header 2": "Header 2", "Header 3": "Another Header"},
+    ]
+    assert from_file[2].page_content == (
+        "Content not to be included when using filter."
+    )
+
+
+def test_split_text_header_hierarchy():
+    """Test that a header resets the metadata of its own and deeper levels.
+
+    Headers without content of their own do not produce a split.
+    """
+    splits = split_text(
+        """
+        <h1>Guide</h1>
+        <h2>Install</h2>
+        <h3>Linux</h3>
+        <p>Linux steps</p>
+        <h2>Usage</h2>
+        <p>Usage steps</p>
+        """
+    )
+
+    assert [(split.metadata, split.page_content) for split in splits] == [
+        (
+            {"Header 1": "Guide", "Header 2": "Install", "Header 3": "Linux"},
+            "Linux steps",
+        ),
+        ({"Header 1": "Guide", "Header 2": "Usage"}, "Usage steps"),
+    ]
+
+
+def test_split_text_inline_markup():
+    """Test that inline elements do not break words or detach punctuation."""
+    splits = split_text(
+        """
+        <h1>Intro</h1>
+        <p>See <a href="#">the docs</a>, then run <code>pip</code>.</p>
+        <p>It is un<b>believ</b>able.</p>
+        <ul><li>one</li><li>two</li></ul>
+        <pre><code><span>def f():</span>
+    <span>return 1</span></code></pre>
+        """
+    )
+
+    assert len(splits) == 1
+    assert splits[0].page_content == (
+        "See the docs, then run pip. It is unbelievable. one two "
+        "def f():\n    return 1"
+    )
+
+
+def test_split_text_ignores_skipped_elements():
+    """Test that headers and text inside template and noscript are ignored."""
+    splits = split_text(
+        """
+        <h1>A</h1>
+        <template><h2>B</h2><p>t</p></template>
+        <p>x</p>
+        <noscript><p>Enable JavaScript</p></noscript>
+        """
+    )
+
+    assert [(split.metadata, split.page_content) for split in splits] == [
+        ({"Header 1": "A"}, "x"),
+    ]
+
+
+def test_split_html_batch(setup_test_data, tmp_path):
+    """Test splitting several HTML files in parallel."""
+    sample2 = setup_test_data / "sample2.html"
+    sample2.write_text("<h2>Only header</h2><p>Only paragraph</p>")
+    file_paths = [setup_test_data / "sample1.html", sample2]
+    output_dir = tmp_path / "batch"
+
+    outputs = split_html_batch(file_paths, output_dir, max_workers=2)
+
+    assert outputs == [
+        (str(output_dir / "sample1.pkl"), str(output_dir / "sample1.txt")),
+        (str(output_dir / "sample2.pkl"), str(output_dir / "sample2.txt")),
+    ]
+
+    with open(outputs[0][0], "rb") as f:
+        assert len(pickle.load(f)) == 3
+    with open(outputs[1][0], "rb") as f:
+        splits = pickle.load(f)
+    assert len(splits) == 1
+    assert splits[0].metadata == {"Header 2": "Only header"}
+    assert splits[0].page_content == "Only paragraph"
+
+
+def test_split_html_batch_same_file_names(tmp_path):
+    """Test that files sharing a name in different directories do not collide."""
+    for directory, text in (("a", "A page"), ("b", "B page")):
+        (tmp_path / "site" / directory).mkdir(parents=True)
+        (tmp_path / "site" / directory / "index.html").write_text(
+            f"<h1>{text}</h1><p>{text} content</p>"
+        )
+    file_paths = [
+        tmp_path / "site" / "a" / "index.html",
+        tmp_path / "site" / "b" / "index.html",
+    ]
+    output_dir = tmp_path / "batch"
+
+    outputs = split_html_batch(file_paths, output_dir, max_workers=2)
+
+    assert outputs == [
+        (str(output_dir / "a" / "index.pkl"), str(output_dir / "a" / "index.txt")),
+        (str(output_dir / "b" / "index.pkl"), str(output_dir / "b" / "index.txt")),
+    ]
+    for (output_pkl, _), text in zip(outputs, ("A page", "B page")):
+        with open(output_pkl, "rb") as f:
+            splits = pickle.load(f)
+        assert splits[0].metadata == {"Header 1": text}
+
+    # The same input twice cannot be given distinct outputs
+    with pytest.raises(ValueError):
+        split_html_batch([file_paths[0], file_paths[0]], output_dir)
+
+
+def test_split_html_batch_failing_input(setup_test_data, tmp_path):
+    """Test that files that could not be split are left out of the result."""
+    file_paths = [setup_test_data / "missing.html", setup_test_data / "sample1.html"]
+    output_dir = tmp_path / "batch"
+
+    outputs = split_html_batch(file_paths, output_dir, max_workers=2)
+
+    assert outputs == [
+        (str(output_dir / "sample1.pkl"), str(output_dir / "sample1.txt")),
+    ]
+    assert not (output_dir / "missing.pkl").exists()